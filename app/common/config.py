@@ -1,3 +1,4 @@
+from typing import Dict
 from pydantic_settings import BaseSettings
 
 
@@ -10,6 +11,19 @@ class Settings(BaseSettings):
     credentials: str = "capstone-project-442502-e205627d1062.json"
     database: str = "bangkit-db"
     firebase_credentials: str = "firebase-credential.json"
+    embedding_batch_size: int = 64
+    embedding_bulk_max_names: int = 10000
+    ocr_workers: int = 4
+    batch_max_images: int = 200
+    batch_max_image_bytes: int = 20 * 1024 * 1024
+    batch_max_zip_bytes: int = 200 * 1024 * 1024
+    llm_receipts_per_call: int = 8
+    log_level: str = "INFO"
+    log_levels: Dict[str, str] = {}
+    log_json: bool = True
+    log_queue_size: int = 10000
+    log_max_payload_chars: int = 1000
+    log_payload_sample_rate: float = 1.0
 
     class Config:
         env_file = ".env"
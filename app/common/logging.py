@@ -1,17 +1,176 @@
+import atexit
+import copy
+import json
+import queue
+import random
 import logging
+import threading
+import logging.handlers
+from contextvars import ContextVar
+from datetime import datetime, timezone
 from app.common.config import settings
 
+# Request id bound for the current request/task, attached to every record
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Attributes present on every LogRecord; anything else was passed via `extra`
+_RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+# Values emitted as-is in JSON records
+_JSON_SCALARS = (bool, int, float, type(None))
+
+
+def truncate(value, max_chars: int = None) -> str:
+    """Render a value as text, truncated to at most ``max_chars`` characters."""
+    max_chars = settings.log_max_payload_chars if max_chars is None else max_chars
+    text = value if isinstance(value, str) else repr(value)
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... [truncated {len(text) - max_chars} chars]"
+
+
+class RequestIdFilter(logging.Filter):
+    """Copy the bound request id onto the record in the caller's context."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(
+                record.created, tz=timezone.utc
+            ).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": truncate(record.getMessage()),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and key not in entry:
+                if not isinstance(value, _JSON_SCALARS):
+                    value = truncate(value)
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that snapshots records in the caller's thread, leaves JSON
+    encoding and output to the listener thread, and drops records instead of
+    blocking when the queue is full.
+
+    Dropped records are counted and reported with a warning record as soon as
+    the queue has room again.
+    """
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self._drop_lock = threading.Lock()
+        self.dropped = 0
+        self.dropped_warnings = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the message and render mutable extras now, so the record shows
+        # its arguments as they were at the log call.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        for key, value in list(vars(record).items()):
+            if key in _RESERVED_ATTRS or isinstance(value, (str, *_JSON_SCALARS)):
+                continue
+            setattr(record, key, truncate(value))
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        with self._drop_lock:
+            try:
+                if self.dropped:
+                    self.queue.put_nowait(self._drop_report(record))
+                    self.dropped = self.dropped_warnings = 0
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+                if record.levelno >= logging.WARNING:
+                    self.dropped_warnings += 1
+
+    def _drop_report(self, record: logging.LogRecord) -> logging.LogRecord:
+        report = logging.makeLogRecord(
+            {
+                "name": record.name,
+                "levelno": logging.WARNING,
+                "levelname": logging.getLevelName(logging.WARNING),
+                "msg": (
+                    f"Dropped {self.dropped} log records "
+                    f"({self.dropped_warnings} at WARNING or above) "
+                    "because the log queue was full"
+                ),
+                "request_id": "-",
+            }
+        )
+        report.dropped = self.dropped
+        return report
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Return a module logger under the application logger.
+
+    Levels from ``settings.log_levels`` are set on their module or package
+    logger at setup and inherited through the logger hierarchy.
+    """
+    return logger.getChild(name)
+
+
+def log_payload(
+    target: logging.Logger, message: str, payload, level: int = logging.DEBUG
+) -> None:
+    """
+    Log a large payload at a sampled rate.
+
+    The payload is only emitted when ``level`` is enabled and the record is
+    picked by ``settings.log_payload_sample_rate``, so unsampled payloads are
+    never rendered. Sampled payloads are truncated when the record is queued.
+    """
+    if not target.isEnabledFor(level):
+        return
+    if random.random() >= settings.log_payload_sample_rate:
+        return
+    target.log(level, message, extra={"payload": payload})
+
+
 logger = logging.getLogger(settings.app_name)
-logger.setLevel(logging.INFO)
+logger.setLevel(settings.log_level.upper())
 logger.propagate = False
 
+for module_name, module_level in settings.log_levels.items():
+    logger.getChild(module_name).setLevel(module_level.upper())
+
 if not logger.handlers:
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
 
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
+    if settings.log_json:
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(request_id)s - %(message)s"
+        )
     console_handler.setFormatter(formatter)
 
-    logger.addHandler(console_handler)
+    log_queue = queue.Queue(maxsize=settings.log_queue_size)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    logger.addHandler(queue_handler)
+
+    # Write to stdout from a background thread
+    listener = logging.handlers.QueueListener(
+        log_queue, console_handler, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
@@ -1,7 +1,9 @@
-from fastapi import FastAPI
+import re
+import uuid
+from fastapi import FastAPI, Request
 from app.routers import embedding_router_v1, receipt_router_v1
 from app.common.config import settings
-from app.common.logging import logger
+from app.common.logging import logger, request_id_var
 
 app = FastAPI(
     title=settings.app_name,
@@ -9,7 +11,25 @@ app = FastAPI(
     debug=settings.debug,
 )
 
-logger.info(f"Starting {settings.app_name}")
+logger.info("Starting %s", settings.app_name)
+
+# Client-supplied request ids must be short tokens; anything else is replaced
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+
+@app.middleware("http")
+async def bind_request_id(request: Request, call_next):
+    """Bind the request id to the logging context and echo it back."""
+    request_id = request.headers.get("x-request-id", "")
+    if not REQUEST_ID_PATTERN.fullmatch(request_id):
+        request_id = uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
 
 
 @app.get("/health", tags=["Health"])
@@ -1,10 +1,12 @@
 import vertexai
 from vertexai.generative_models import GenerativeModel
 from app.common.config import settings
-from app.common.logging import logger
+from app.common.logging import get_logger, log_payload
 from google.auth.transport.requests import Request
 # from google.oauth2.service_account import Credentials
 
+logger = get_logger(__name__)
+
 
 class VertexAILLM:
     """
@@ -46,7 +48,7 @@ class VertexAILLM:
 
             # Generate the response
             response = model.generate_content(prompt)
-            logger.info(response.text)
+            log_payload(logger, "Gemini response", response.text)
 
             return response.text
         except Exception as e:
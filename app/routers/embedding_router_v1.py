@@ -1,13 +1,28 @@
-from fastapi import APIRouter, HTTPException, Form
+import json
+from fastapi import APIRouter, HTTPException, Form, Request, Response
+from app.common.config import settings
 from app.services.embedding_service_v1 import (
     generate_embeddings,
+    generate_bulk_embeddings,
     create_index,
     create_index_from_csv,
 )
+from app.utils.embedding_utils import (
+    NDJSON_MEDIA_TYPE,
+    NPY_MEDIA_TYPE,
+    negotiate_output_format,
+    parse_ndjson_line,
+    parse_product_names,
+    to_base64,
+    to_npy_bytes,
+)
 
 
 router = APIRouter(prefix="/embeddings")
 
+# Longest NDJSON line accepted before the stream is rejected
+MAX_NDJSON_LINE_BYTES = 64 * 1024
+
 
 @router.post("/inference")
 async def process_receipt(
@@ -23,6 +38,98 @@ async def process_receipt(
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
 
+@router.post("/inference/bulk")
+async def process_bulk(request: Request):
+    """
+    Generate embeddings for many product names at once.
+
+    The body is either a JSON list of names (or {"product_names": [...]}) or an
+    NDJSON stream with one name per line. The Accept header selects the output:
+    application/json returns the matrix as base64 and application/x-npy returns
+    raw .npy bytes. Add "; dtype=float16" to either for half-precision vectors.
+    """
+    try:
+        media_type, dtype = negotiate_output_format(request.headers.get("accept"))
+    except ValueError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+    try:
+        product_names = await read_product_names(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not product_names:
+        raise HTTPException(status_code=400, detail="No product names provided")
+
+    try:
+        embeddings = await generate_bulk_embeddings(product_names, dtype)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
+
+    if media_type == NPY_MEDIA_TYPE:
+        return Response(content=to_npy_bytes(embeddings), media_type=NPY_MEDIA_TYPE)
+
+    return {
+        "status": "success",
+        "message": "Embeddings generated successfully",
+        "data": {
+            "product_names": product_names,
+            "dtype": dtype,
+            "shape": list(embeddings.shape),
+            "embeddings": to_base64(embeddings),
+        },
+    }
+
+
+async def read_product_names(request: Request) -> list:
+    """
+    Read product names from a JSON or NDJSON request body.
+
+    NDJSON streams stop being read as soon as the name limit is exceeded.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    max_names = settings.embedding_bulk_max_names
+
+    if content_type == NDJSON_MEDIA_TYPE:
+        product_names = []
+
+        def add_line(line: bytes):
+            name = parse_ndjson_line(line)
+            if name is None:
+                return
+            if len(product_names) >= max_names:
+                raise too_many_names(max_names)
+            product_names.append(name)
+
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                add_line(line)
+            if len(buffer) > MAX_NDJSON_LINE_BYTES:
+                raise ValueError(
+                    f"NDJSON lines must be at most {MAX_NDJSON_LINE_BYTES} bytes."
+                )
+        add_line(buffer)
+        return product_names
+
+    try:
+        payload = json.loads(await request.body())
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON body: {e}")
+    product_names = parse_product_names(payload)
+    if len(product_names) > max_names:
+        raise too_many_names(max_names)
+    return product_names
+
+
+def too_many_names(max_names: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Too many product names. The maximum is {max_names}.",
+    )
+
+
 @router.get("/index")
 async def process_receipt():
     try:
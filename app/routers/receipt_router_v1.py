@@ -1,5 +1,11 @@
+import zipfile
+from typing import List
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from app.services.receipt_service_v1 import process_receipt_image
+from app.common.config import settings
+from app.services.receipt_service_v1 import process_receipt_image, process_receipt_images
+from app.utils.image_utils import extract_images_from_zip
+
+ZIP_CONTENT_TYPES = {"application/zip", "application/x-zip-compressed"}
 
 router = APIRouter(prefix="/receipt")
 
@@ -21,3 +27,68 @@ async def process_receipt(
         return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
+
+
+@router.post("/inference/batch")
+async def process_receipt_batch(
+    user_id: str = Form(..., description="User ID associated with the receipts"),
+    images: List[UploadFile] = File(
+        ..., description="Receipt image files, or zip archives of receipt images"
+    ),
+):
+    if not user_id:
+        raise HTTPException(status_code=400, detail="Invalid user_id")
+
+    receipts = []
+    for image in images:
+        remaining = settings.batch_max_images - len(receipts)
+        if remaining <= 0:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many receipts. The maximum is {settings.batch_max_images}.",
+            )
+        contents = await image.read()
+        filename = image.filename or f"receipt_{len(receipts)}"
+        if image.content_type in ZIP_CONTENT_TYPES or filename.lower().endswith(".zip"):
+            try:
+                receipts.extend(
+                    extract_images_from_zip(
+                        contents,
+                        remaining,
+                        settings.batch_max_image_bytes,
+                        settings.batch_max_zip_bytes,
+                    )
+                )
+            except (
+                zipfile.BadZipFile,
+                ValueError,
+                RuntimeError,
+                NotImplementedError,
+            ) as e:
+                raise HTTPException(
+                    status_code=400, detail=f"Invalid zip archive {filename}: {e}"
+                )
+        elif image.content_type and image.content_type.startswith("image/"):
+            if len(contents) > settings.batch_max_image_bytes:
+                raise HTTPException(
+                    status_code=400,
+                    detail=(
+                        f"{filename} exceeds the maximum size of "
+                        f"{settings.batch_max_image_bytes} bytes."
+                    ),
+                )
+            receipts.append((filename, contents))
+        else:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid file type for {filename}. Please upload images or a zip.",
+            )
+
+    if not receipts:
+        raise HTTPException(status_code=400, detail="No receipt images provided")
+
+    try:
+        response = await process_receipt_images(receipts, user_id)
+        return response
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
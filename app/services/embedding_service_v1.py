@@ -1,13 +1,18 @@
 import faiss
 import json
+import asyncio
+from typing import List
 import pandas as pd
 import numpy as np
 from google.cloud import firestore
 # from google.oauth2 import service_account
-from app.common.logging import logger
+from app.common.logging import get_logger
 from app.models.embedding import embedding_model
 from app.common.config import settings
 from app.services.receipt_service_v1 import load_faiss_and_metadata
+from app.utils.embedding_utils import SUPPORTED_DTYPES
+
+logger = get_logger(__name__)
 
 
 async def generate_embeddings(product_name: str) -> dict:
@@ -21,13 +26,13 @@ async def generate_embeddings(product_name: str) -> dict:
         dict: A dictionary containing the status, message, and generated embeddings.
     """
     try:
-        logger.info("Starting to generate embeddings...")
+        logger.debug("Starting to generate embeddings...")
 
         # Generate embeddings using the model
         embeddings = embedding_model.embed_query(product_name)
 
         # Log success
-        logger.info(f"Processed successfully for product_name: {product_name}")
+        logger.info("Processed successfully for product_name: %s", product_name)
 
         # Return success response
         return {
@@ -37,7 +42,7 @@ async def generate_embeddings(product_name: str) -> dict:
         }
 
     except Exception as e:
-        logger.error(f"Error generating embeddings: {e}")
+        logger.error("Error generating embeddings: %s", e)
         return {
             "status": "failed",
             "message": "Failed to generate embeddings. Please try again.",
@@ -45,6 +50,41 @@ async def generate_embeddings(product_name: str) -> dict:
         }
 
 
+async def generate_bulk_embeddings(
+    product_names: List[str], dtype: str = "float32"
+) -> np.ndarray:
+    """
+    Generate embeddings for many product names in a single batched call.
+
+    Vectors are encoded straight into a NumPy matrix so they can be serialized
+    without a round trip through Python float lists.
+
+    Args:
+        product_names (List[str]): The product names for which embeddings are generated.
+        dtype (str): Output dtype, either "float32" or "float16".
+
+    Returns:
+        np.ndarray: A (len(product_names), embedding_dim) matrix in request order.
+    """
+    logger.debug("Starting to generate embeddings for %d products...", len(product_names))
+
+    # Match HuggingFaceEmbeddings.embed_documents so vectors agree with the index
+    texts = [name.replace("\n", " ") for name in product_names]
+    encode_kwargs = {
+        "batch_size": settings.embedding_batch_size,
+        "show_progress_bar": False,
+        **embedding_model.encode_kwargs,
+        "convert_to_numpy": True,
+    }
+    embeddings = await asyncio.to_thread(
+        embedding_model.client.encode, texts, **encode_kwargs
+    )
+    embeddings = np.asarray(embeddings, dtype=SUPPORTED_DTYPES[dtype])
+
+    logger.info("Generated %d embeddings successfully", embeddings.shape[0])
+    return embeddings
+
+
 async def create_index_from_csv(
     csv_file: str = "./app/files/data.csv",
     embedding_dim: int = 384,
@@ -67,7 +107,7 @@ async def create_index_from_csv(
         logger.info("Starting to create FAISS index from CSV...")
 
         # Load data from CSV
-        logger.info(f"Loading data from CSV file: {csv_file}")
+        logger.info("Loading data from CSV file: %s", csv_file)
         df = pd.read_csv(csv_file)
 
         # Validate required columns
@@ -86,7 +126,7 @@ async def create_index_from_csv(
 
             # Skip rows without product_name
             if not product_name or pd.isna(product_name):
-                logger.warning(f"Skipping row {idx} with missing product_name.")
+                logger.warning("Skipping row %s with missing product_name.", idx)
                 continue
 
             # Generate embedding
@@ -105,12 +145,12 @@ async def create_index_from_csv(
 
         # Save FAISS index locally
         faiss.write_index(index, index_file)
-        logger.info(f"FAISS index created and saved to {index_file}")
+        logger.info("FAISS index created and saved to %s", index_file)
 
         # Save metadata locally
         with open(metadata_file, "w") as f:
             json.dump(product_metadata, f, indent=4)
-        logger.info(f"Metadata saved to {metadata_file}")
+        logger.info("Metadata saved to %s", metadata_file)
         load_faiss_and_metadata()
 
         # Return success response
@@ -125,7 +165,7 @@ async def create_index_from_csv(
         }
 
     except Exception as e:
-        logger.error(f"Error creating FAISS index from CSV: {e}")
+        logger.error("Error creating FAISS index from CSV: %s", e)
         return {
             "status": "failed",
             "message": "Failed to create FAISS index. Please try again.",
@@ -165,7 +205,7 @@ async def create_index(
         )
 
         # Fetch product data from Firestore
-        logger.info(f"Fetching data from Firestore collection: {collection_name}")
+        logger.info("Fetching data from Firestore collection: %s", collection_name)
         docs = firestore_client.collection(collection_name).stream()
 
         # Initialize FAISS index
@@ -178,7 +218,7 @@ async def create_index(
             product_name = data.get("product_name", "")
             price = data.get("price", "")
             if not product_name:
-                logger.warning(f"Skipping document {doc.id} with no product_name")
+                logger.warning("Skipping document %s with no product_name", doc.id)
                 continue
 
             # Generate embedding
@@ -193,12 +233,12 @@ async def create_index(
 
         # Save FAISS index locally
         faiss.write_index(index, index_file)
-        logger.info(f"FAISS index created and saved to {index_file}")
+        logger.info("FAISS index created and saved to %s", index_file)
 
         # Save metadata locally
         with open(metadata_file, "w") as f:
             json.dump(product_metadata, f, indent=4)
-        logger.info(f"Metadata saved to {metadata_file}")
+        logger.info("Metadata saved to %s", metadata_file)
         load_faiss_and_metadata()
 
         # Return success response
@@ -213,7 +253,7 @@ async def create_index(
         }
 
     except Exception as e:
-        logger.error(f"Error creating FAISS index: {e}")
+        logger.error("Error creating FAISS index: %s", e)
         return {
             "status": "failed",
             "message": "Failed to create FAISS index. Please try again.",
@@ -1,17 +1,26 @@
 import io
 import faiss
 import json
+import asyncio
+import threading
+import contextvars
 import numpy as np
 from paddleocr import PaddleOCR
 from PIL import Image
 from datetime import datetime
+from typing import List, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import UploadFile
-from app.common.logging import logger
+from app.common.config import settings
+from app.common.logging import get_logger, log_payload
 from app.utils.image_utils import preprocess_image
-from app.utils.llm_utils import fix_typos_and_parse
+from app.utils.embedding_utils import validate_product_name
+from app.utils.llm_utils import fix_typos_and_parse, parse_receipt_texts
 from app.utils.timestamp_utils import is_valid_timestamp
 from app.models.embedding import embedding_model
 
+logger = get_logger(__name__)
+
 # Constants for file paths
 FAISS_INDEX_FILE = "./app/files/faiss_index.index"
 PRODUCT_METADATA_FILE = "./app/files/faiss_metadata.json"
@@ -22,6 +31,12 @@ ocr = PaddleOCR(use_angle_cls=True, lang="en", rec_model_dir=PRETRAINED_FILE)
 faiss_index = None
 product_metadata = {}
 
+# Worker pool for batch OCR; each worker thread owns its own PaddleOCR instance
+ocr_executor = ThreadPoolExecutor(
+    max_workers=settings.ocr_workers, thread_name_prefix="ocr"
+)
+_ocr_local = threading.local()
+
 
 def load_faiss_and_metadata():
     """Load FAISS index and metadata."""
@@ -36,9 +51,9 @@ def load_faiss_and_metadata():
             product_metadata = json.load(f)
         logger.info("Product metadata loaded successfully.")
     except FileNotFoundError as e:
-        logger.error(f"File not found: {e}")
+        logger.error("File not found: %s", e)
     except Exception as e:
-        logger.error(f"Error loading FAISS index or metadata: {e}")
+        logger.error("Error loading FAISS index or metadata: %s", e)
 
 
 # Initialize FAISS and metadata
@@ -71,14 +86,14 @@ async def process_receipt_image(image: UploadFile, user_id: str) -> dict:
         # Step 4: Validate products using FAISS vector search
         data = validate_products_with_faiss(data)
 
-        logger.info(f"Receipt processed successfully for user_id: {user_id}")
+        logger.info("Receipt processed successfully for user_id: %s", user_id)
         return {
             "status": "success",
             "message": "Receipt processed successfully",
             "data": data,
         }
     except Exception as e:
-        logger.error(f"Error processing receipt: {e}")
+        logger.error("Error processing receipt: %s", e)
         return {
             "status": "failed",
             "message": "Failed to process receipt. Please try again.",
@@ -86,22 +101,175 @@ async def process_receipt_image(image: UploadFile, user_id: str) -> dict:
         }
 
 
+async def process_receipt_images(images: List[Tuple[str, bytes]], user_id: str) -> dict:
+    """
+    Process a batch of receipt images for one user.
+
+    OCR runs across a worker pool, the OCR text of several receipts is parsed
+    with a single LLM call, and all items are validated with one FAISS search.
+    Failures are isolated to the receipt they occurred in.
+    Args:
+        images (List[Tuple[str, bytes]]): (filename, image bytes) pairs.
+        user_id (str): User identifier.
+    Returns:
+        dict: Per-receipt results in input order.
+    """
+    logger.info("Starting batch receipt processing for %d images...", len(images))
+    results = [
+        {"filename": filename, "status": "failed", "message": None, "data": None}
+        for filename, _ in images
+    ]
+
+    def fail(idx: int, error: Exception):
+        logger.error("Error processing receipt %s: %s", results[idx]["filename"], error)
+        results[idx]["message"] = f"Failed to process receipt: {error}"
+
+    # Step 1 & 2: Preprocess images and perform OCR across the worker pool
+    ocr_outputs = await asyncio.gather(
+        *[run_in_ocr_pool(ocr_receipt_image, contents) for _, contents in images],
+        return_exceptions=True,
+    )
+    extracted_texts = {}
+    for idx, output in enumerate(ocr_outputs):
+        if isinstance(output, Exception):
+            fail(idx, output)
+        else:
+            extracted_texts[idx] = output
+
+    # Step 3: Fix typos and parse several receipts per LLM call
+    products = [product["product_name"] for product in product_metadata.values()]
+    pending = list(extracted_texts)
+    chunk_size = max(1, settings.llm_receipts_per_call)
+    chunks = [pending[i : i + chunk_size] for i in range(0, len(pending), chunk_size)]
+    parsed_chunks = await asyncio.gather(
+        *[
+            asyncio.to_thread(
+                parse_receipt_texts,
+                [extracted_texts[idx] for idx in chunk],
+                products,
+            )
+            for chunk in chunks
+        ]
+    )
+    receipts = {}
+    for chunk, parsed in zip(chunks, parsed_chunks):
+        for idx, structured_data in zip(chunk, parsed):
+            if isinstance(structured_data, Exception):
+                fail(idx, structured_data)
+                continue
+            try:
+                receipts[idx] = prepare_initial_data(structured_data, user_id)
+            except Exception as e:
+                fail(idx, e)
+
+    # Step 4: Validate all products with a single FAISS vector search
+    if faiss_index and product_metadata:
+        product_names = {}
+        for idx, data in list(receipts.items()):
+            try:
+                product_names[idx] = [
+                    validate_product_name(item["product_name"]) for item in data["items"]
+                ]
+            except Exception as e:
+                del receipts[idx]
+                fail(idx, e)
+
+        all_names = [name for names in product_names.values() for name in names]
+        try:
+            distances, indices = await asyncio.to_thread(
+                search_products_with_faiss, all_names
+            )
+        except Exception as e:
+            for idx in product_names:
+                del receipts[idx]
+                fail(idx, e)
+            product_names = {}
+        offset = 0
+        for idx, names in product_names.items():
+            end = offset + len(names)
+            try:
+                apply_product_matches(
+                    receipts[idx], distances[offset:end], indices[offset:end]
+                )
+            except Exception as e:
+                del receipts[idx]
+                fail(idx, e)
+            offset = end
+    else:
+        logger.warning("FAISS index or metadata not loaded. Skipping validation.")
+
+    for idx, data in receipts.items():
+        results[idx].update(
+            {
+                "status": "success",
+                "message": "Receipt processed successfully",
+                "data": data,
+            }
+        )
+
+    succeeded = len(receipts)
+    if succeeded == len(images):
+        status = "success"
+    elif succeeded:
+        status = "partial"
+    else:
+        status = "failed"
+    logger.info(
+        "Batch processed for user_id: %s (%d/%d receipts succeeded)",
+        user_id,
+        succeeded,
+        len(images),
+    )
+    return {
+        "status": status,
+        "message": f"{succeeded} of {len(images)} receipts processed successfully",
+        "data": {"user_id": user_id, "results": results},
+    }
+
+
 async def load_and_preprocess_image(image: UploadFile) -> Image:
     """Read and preprocess the uploaded image."""
-    logger.info("Reading and preprocessing the uploaded image.")
+    logger.debug("Reading and preprocessing the uploaded image.")
     contents = await image.read()
-    pil_image = Image.open(io.BytesIO(contents)).convert("RGB")
-    numpy_image = preprocess_image(pil_image)
-    logger.info("Image preprocessing completed.")
+    numpy_image = decode_and_preprocess_image(contents)
+    logger.debug("Image preprocessing completed.")
     return numpy_image
 
 
-def perform_ocr(image) -> list:
+def decode_and_preprocess_image(contents: bytes) -> np.ndarray:
+    """Decode raw image bytes and preprocess them for OCR."""
+    pil_image = Image.open(io.BytesIO(contents)).convert("RGB")
+    return preprocess_image(pil_image)
+
+
+def get_ocr_engine() -> PaddleOCR:
+    """Return the PaddleOCR instance owned by the current worker thread."""
+    engine = getattr(_ocr_local, "engine", None)
+    if engine is None:
+        engine = PaddleOCR(use_angle_cls=True, lang="en", rec_model_dir=PRETRAINED_FILE)
+        _ocr_local.engine = engine
+    return engine
+
+
+def ocr_receipt_image(contents: bytes) -> list:
+    """Preprocess an image and perform OCR on it inside an OCR worker."""
+    return perform_ocr(decode_and_preprocess_image(contents), get_ocr_engine())
+
+
+async def run_in_ocr_pool(func, *args):
+    """Run a function on the OCR worker pool, keeping the logging context."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(ocr_executor, context.run, func, *args)
+
+
+def perform_ocr(image, engine: PaddleOCR = None) -> list:
     """Perform OCR on the preprocessed image."""
-    logger.info("Running OCR on the preprocessed image.")
-    results = ocr.ocr(image, cls=True)
+    logger.debug("Running OCR on the preprocessed image.")
+    results = (engine or ocr).ocr(image, cls=True)
     extracted_text = [line[1][0] for line in results[0]]
-    logger.info(f"Extracted text: {extracted_text}")
+    logger.info("Extracted %d lines of text.", len(extracted_text))
+    log_payload(logger, "Extracted text", extracted_text)
     return extracted_text
 
 
@@ -116,7 +284,7 @@ def prepare_initial_data(structured_data: dict, user_id: str) -> dict:
         "items": structured_data.get("items", []),
         "total_price": structured_data.get("total_price", 0),
     }
-    logger.info("Initial receipt data prepared.")
+    logger.debug("Initial receipt data prepared.")
     return data
 
 
@@ -126,18 +294,35 @@ def validate_products_with_faiss(data: dict) -> dict:
         logger.warning("FAISS index or metadata not loaded. Skipping validation.")
         return data
 
-    logger.info("Validating products using FAISS vector search.")
+    logger.debug("Validating products using FAISS vector search.")
+    product_names = [item["product_name"] for item in data["items"]]
+    distances, indices = search_products_with_faiss(product_names)
+    data = apply_product_matches(data, distances, indices)
+    logger.debug("Product validation completed.")
+    return data
+
+
+def search_products_with_faiss(product_names: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Embed product names in one batch and find their nearest neighbours."""
+    if not product_names:
+        return np.empty((0, 1), dtype=np.float32), np.empty((0, 1), dtype=np.int64)
+
+    embeddings = np.array(
+        embedding_model.embed_documents(product_names), dtype=np.float32
+    )
+    return faiss_index.search(embeddings, k=1)
+
+
+def apply_product_matches(
+    data: dict, distances: np.ndarray, indices: np.ndarray
+) -> dict:
+    """Update receipt items with their FAISS matches and drop unmatched items."""
     valid_items = []
     total_price = 0
 
-    for item in data["items"]:
-        product_name = item["product_name"]
-        embedding = np.array(embedding_model.embed_query(product_name)).reshape(1, -1)
-
-        # Perform FAISS search
-        distances, indices = faiss_index.search(embedding, k=1)
-        if distances[0][0] < 1:  # Match threshold
-            matched_product = product_metadata[str(indices[0][0])]
+    for item, distance, index in zip(data["items"], distances, indices):
+        if distance[0] < 1:  # Match threshold
+            matched_product = product_metadata[str(index[0])]
             item.update(
                 {
                     "product_id": matched_product["product_id"],
@@ -151,10 +336,10 @@ def validate_products_with_faiss(data: dict) -> dict:
             valid_items.append(item)
         else:
             logger.warning(
-                f"Product {product_name} has no similar match and was removed."
+                "Product %s has no similar match and was removed.",
+                item["product_name"],
             )
 
     data["items"] = valid_items
     data["total_price"] = total_price
-    logger.info("Product validation completed.")
     return data
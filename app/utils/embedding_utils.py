@@ -0,0 +1,122 @@
+from typing import List, Optional, Tuple
+import io
+import json
+import base64
+import numpy as np
+
+# Supported output media types and vector dtypes for bulk embeddings
+JSON_MEDIA_TYPE = "application/json"
+NPY_MEDIA_TYPE = "application/x-npy"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SUPPORTED_DTYPES = {"float32": np.float32, "float16": np.float16}
+
+
+def parse_product_names(payload) -> List[str]:
+    """
+    Extract product names from a JSON request body.
+
+    Args:
+        payload: Either a list of names or an object with a "product_names" list.
+
+    Returns:
+        List[str]: The product names in request order.
+    """
+    if isinstance(payload, dict):
+        payload = payload.get("product_names")
+    if not isinstance(payload, list):
+        raise ValueError(
+            "Request body must be a list of product names or "
+            'an object with a "product_names" list.'
+        )
+    return [validate_product_name(name) for name in payload]
+
+
+def parse_ndjson_line(line: bytes) -> Optional[str]:
+    """
+    Parse a single NDJSON line into a product name.
+
+    Each line is either a JSON string or an object with a "product_name" key.
+    Blank lines are ignored and return None.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    record = json.loads(line)
+    if isinstance(record, dict):
+        record = record.get("product_name")
+    return validate_product_name(record)
+
+
+def negotiate_output_format(accept: Optional[str]) -> Tuple[str, str]:
+    """
+    Pick the output media type and dtype from an Accept header.
+
+    The dtype is passed as a media type parameter, for example
+    ``application/x-npy; dtype=float16``. Media ranges are ranked by their
+    ``q`` value (header order breaks ties) and ranges with ``q=0`` are never
+    selected; ``*/*`` or a missing header selects JSON.
+
+    Returns:
+        Tuple[str, str]: The media type and dtype name.
+    """
+    if not accept:
+        return JSON_MEDIA_TYPE, "float32"
+
+    candidates = []
+    for media_range in accept.split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        media_type = media_type.lower()
+        if media_type in ("*/*", "application/*"):
+            media_type = JSON_MEDIA_TYPE
+        if media_type not in (JSON_MEDIA_TYPE, NPY_MEDIA_TYPE):
+            continue
+
+        dtype, quality = "float32", 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            key, value = key.strip().lower(), value.strip().strip('"').lower()
+            if key == "dtype":
+                dtype = value
+            elif key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            candidates.append((quality, media_type, dtype))
+
+    if not candidates:
+        raise ValueError(
+            f"Unsupported Accept header. Use {JSON_MEDIA_TYPE} or {NPY_MEDIA_TYPE}."
+        )
+
+    # sorted() is stable, so equal q values keep their header order
+    _, media_type, dtype = sorted(candidates, key=lambda c: -c[0])[0]
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(
+            f"Unsupported dtype '{dtype}'. "
+            f"Supported dtypes: {', '.join(SUPPORTED_DTYPES)}"
+        )
+    return media_type, dtype
+
+
+def to_base64(embeddings: np.ndarray) -> str:
+    """Encode an embedding matrix as base64 of its little-endian raw bytes."""
+    little_endian = embeddings.astype(embeddings.dtype.newbyteorder("<"), copy=False)
+    return base64.b64encode(np.ascontiguousarray(little_endian).tobytes()).decode(
+        "ascii"
+    )
+
+
+def to_npy_bytes(embeddings: np.ndarray) -> bytes:
+    """Serialize an embedding matrix in NumPy's ``.npy`` format."""
+    buffer = io.BytesIO()
+    np.save(buffer, embeddings, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def validate_product_name(name) -> str:
+    """Return the name if it is a non-empty string, otherwise raise ValueError."""
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError(f"Invalid product_name: {name!r}")
+    return name
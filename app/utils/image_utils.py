@@ -1,6 +1,13 @@
+from typing import List, Tuple
 from PIL import Image, ImageEnhance
+import io
+import os
+import zlib
+import zipfile
 import numpy as np
 
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tif", ".tiff", ".webp"}
+
 
 def preprocess_image(pil_image: Image, max_size: int = 1024) -> np.ndarray:
     """
@@ -21,3 +28,50 @@ def preprocess_image(pil_image: Image, max_size: int = 1024) -> np.ndarray:
 
     numpy_image = np.array(pil_image)
     return numpy_image
+
+
+def extract_images_from_zip(
+    contents: bytes, max_images: int, max_file_size: int, max_total_size: int
+) -> List[Tuple[str, bytes]]:
+    """
+    Extract image files from a zip archive.
+
+    Uncompressed sizes are checked before any entry is read, so oversized
+    archives are rejected without being decompressed.
+
+    Args:
+        contents (bytes): Raw bytes of the zip archive.
+        max_images (int): Maximum number of images allowed in the archive.
+        max_file_size (int): Maximum uncompressed size of a single image in bytes.
+        max_total_size (int): Maximum uncompressed size of all images in bytes.
+
+    Returns:
+        List[Tuple[str, bytes]]: (filename, image bytes) pairs in archive order.
+    """
+    images = []
+    with zipfile.ZipFile(io.BytesIO(contents)) as archive:
+        members = [
+            info
+            for info in archive.infolist()
+            if not info.is_dir()
+            and not os.path.basename(info.filename).startswith(".")
+            and os.path.splitext(info.filename)[1].lower() in IMAGE_EXTENSIONS
+        ]
+        if len(members) > max_images:
+            raise ValueError(f"Zip archive contains more than {max_images} images.")
+        for info in members:
+            if info.file_size > max_file_size:
+                raise ValueError(
+                    f"{info.filename} exceeds the maximum size of {max_file_size} bytes."
+                )
+        if sum(info.file_size for info in members) > max_total_size:
+            raise ValueError(
+                f"Zip archive exceeds the maximum uncompressed size of {max_total_size} bytes."
+            )
+
+        for info in members:
+            try:
+                images.append((info.filename, archive.read(info)))
+            except (zlib.error, EOFError) as e:
+                raise ValueError(f"Corrupt entry {info.filename}: {e}")
+    return images
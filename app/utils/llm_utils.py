@@ -1,10 +1,17 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Union
 import json
+from app.common.logging import get_logger
 from app.models.llm import VertexAILLM
 
+logger = get_logger(__name__)
+
 gemini_llm = VertexAILLM()
 
 
+class LLMResponseError(ValueError):
+    """Raised when a Gemini response does not contain the expected JSON."""
+
+
 def fix_typos_and_parse(extracted_text: List[str], products: list) -> Dict:
     """
     Fix typos in extracted text and parse it into structured data using Gemini.
@@ -70,16 +77,165 @@ def fix_typos_and_parse(extracted_text: List[str], products: list) -> Dict:
     """
 
     response = gemini_llm.generate(prompt)
+    return extract_json(response, "{", "}")
+
+
+def fix_typos_and_parse_batch(
+    extracted_texts: List[List[str]], products: list
+) -> List[Optional[Dict]]:
+    """
+    Fix typos and parse the OCR text of several receipts with a single Gemini call.
+
+    Returns one entry per receipt, in input order. An entry is None when the
+    model did not return a usable result for that receipt.
+    """
+    # Create product context
+    product_context = ",".join(products)
+    receipts = "\n".join(
+        f"Receipt {idx}: {text}" for idx, text in enumerate(extracted_texts)
+    )
+
+    prompt = f"""
+    You are an advanced AI assistant tasked with processing OCR text from several receipts. Your goal is to extract structured data for each receipt with the following requirements:
+
+    Here is the list of products available in the store:
+    {product_context}
+
+    Input (one line per receipt, prefixed with its receipt index):
+    {receipts}
+
+    Tasks:
+    1. Process every receipt independently. Never merge items from different receipts.
+    2. Correct any typos in product names.
+    3. Parse the information into a JSON array with exactly one object per receipt, using the following structure:
+       [
+           {{
+               "receipt_index": <index of the receipt in the input>,
+               "timestamp": "<timestamp in ISO 8601 format (YYYY-MM-DDTHH:MM:SS)>",
+               "items": [
+                   {{
+                       "product_name": "<corrected product name>",
+                       "quantity": <integer quantity>,
+                       "price_per_unit": 0,
+                       "total_price": 0
+                   }}
+               ],
+               "total_price": 0
+           }}
+       ]
+    4. Extract only the product name, quantity, and timestamp (if present) from the OCR text.
+    5. If a timestamp exists, convert it to ISO 8601 format (YYYY-MM-DDTHH:MM:SS). If no timestamp is found, set "timestamp" to null.
+    6. Leave "price_per_unit" and "total_price" as 0 for all items.
+    7. If quantity is a large number, change it to 0.
+
+    Additional Notes:
+    - Use double quotes (") for all property names and string values to ensure the response is valid JSON.
+    - Ensure all numbers (e.g., quantity, receipt_index) are represented as integers, not strings.
+    - Return only the JSON array, strictly adhering to the specified format.
+    - Do not include any additional text or comments in the output.
+
+    Example Output:
+    [
+        {{
+            "receipt_index": 0,
+            "timestamp": "2024-11-23T12:41:30",
+            "items": [
+                {{
+                    "product_name": "Apple",
+                    "quantity": 2,
+                    "price_per_unit": 0,
+                    "total_price": 0
+                }}
+            ],
+            "total_price": 0
+        }},
+        {{
+            "receipt_index": 1,
+            "timestamp": null,
+            "items": [
+                {{
+                    "product_name": "Orange",
+                    "quantity": 1,
+                    "price_per_unit": 0,
+                    "total_price": 0
+                }}
+            ],
+            "total_price": 0
+        }}
+    ]
+    """
+
+    response = gemini_llm.generate(prompt)
+    json_response = extract_json(response, "[", "]")
+    if not isinstance(json_response, list):
+        raise LLMResponseError("Expected a JSON array in the response.")
+
+    results = [None] * len(extracted_texts)
+    for entry in json_response:
+        if not isinstance(entry, dict):
+            continue
+        idx = entry.pop("receipt_index", None)
+        if isinstance(idx, int) and 0 <= idx < len(results) and results[idx] is None:
+            results[idx] = entry
+    return results
+
+
+def extract_json(response: str, start_char: str, end_char: str):
+    """
+    Extract and parse the outermost JSON value delimited by start_char/end_char.
+    """
     try:
         # Extract the JSON part from the response
-        start_idx = response.find("{")
-        end_idx = response.rfind("}") + 1
+        start_idx = response.find(start_char)
+        end_idx = response.rfind(end_char) + 1
         if start_idx == -1 or end_idx == 0:
-            raise ValueError("No JSON object found in the response.")
+            raise LLMResponseError("No JSON object found in the response.")
 
         json_response = json.loads(response[start_idx:end_idx])
         return json_response
+    except LLMResponseError:
+        raise
     except json.JSONDecodeError as e:
-        raise ValueError(f"Error parsing JSON response from Gemini: {e}")
+        raise LLMResponseError(f"Error parsing JSON response from Gemini: {e}")
+    except Exception as e:
+        raise LLMResponseError(f"Unexpected error occurred: {e}")
+
+
+def parse_receipt_texts(
+    extracted_texts: List[List[str]], products: list
+) -> List[Union[Dict, Exception]]:
+    """
+    Parse several receipts' OCR text, isolating LLM failures per receipt.
+
+    The receipts are sent in one multi-receipt call. If the response cannot be
+    parsed the chunk is split in half and retried, down to single-receipt
+    calls; receipts missing from a parsed response are retried on their own.
+    Other errors (e.g. Vertex AI outages or quota errors) fail the whole chunk
+    without further calls.
+    Returns one structured dict, or the exception that occurred, per receipt.
+    """
+    if len(extracted_texts) == 1:
+        try:
+            return [fix_typos_and_parse(extracted_texts[0], products)]
+        except Exception as e:
+            return [e]
+
+    try:
+        parsed = fix_typos_and_parse_batch(extracted_texts, products)
+    except LLMResponseError as e:
+        logger.warning(
+            "Batch parsing of %d receipts failed, splitting: %s", len(extracted_texts), e
+        )
+        middle = len(extracted_texts) // 2
+        return parse_receipt_texts(
+            extracted_texts[:middle], products
+        ) + parse_receipt_texts(extracted_texts[middle:], products)
     except Exception as e:
-        raise ValueError(f"Unexpected error occurred: {e}")
+        return [e] * len(extracted_texts)
+
+    return [
+        structured_data
+        if structured_data is not None
+        else parse_receipt_texts([text], products)[0]
+        for text, structured_data in zip(extracted_texts, parsed)
+    ]
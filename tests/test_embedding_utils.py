@@ -0,0 +1,83 @@
+import io
+import base64
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.utils.embedding_utils import (
+    JSON_MEDIA_TYPE,
+    NPY_MEDIA_TYPE,
+    negotiate_output_format,
+    parse_ndjson_line,
+    parse_product_names,
+    to_base64,
+    to_npy_bytes,
+)
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, (JSON_MEDIA_TYPE, "float32")),
+        ("*/*", (JSON_MEDIA_TYPE, "float32")),
+        ("text/html, application/x-npy", (NPY_MEDIA_TYPE, "float32")),
+        ("application/x-npy; dtype=float16", (NPY_MEDIA_TYPE, "float16")),
+        ("application/x-npy;q=0.1, application/json", (JSON_MEDIA_TYPE, "float32")),
+        ("application/json;q=0.5, application/x-npy;q=0.5", (JSON_MEDIA_TYPE, "float32")),
+        ("application/json;q=0, application/x-npy;q=0.2", (NPY_MEDIA_TYPE, "float32")),
+    ],
+)
+def test_negotiate_output_format(accept, expected):
+    assert negotiate_output_format(accept) == expected
+
+
+@pytest.mark.parametrize(
+    "accept",
+    ["text/html", "application/json;q=0", "application/json; dtype=int8"],
+)
+def test_negotiate_output_format_rejects(accept):
+    with pytest.raises(ValueError):
+        negotiate_output_format(accept)
+
+
+def test_parse_ndjson_line():
+    assert parse_ndjson_line(b'"Apple"') == "Apple"
+    assert parse_ndjson_line(b'{"product_name": "Orange"}\r') == "Orange"
+    assert parse_ndjson_line(b"   ") is None
+
+
+@pytest.mark.parametrize("line", [b"null", b"42", b'{"name": "x"}', b'""', b"{bad"])
+def test_parse_ndjson_line_rejects(line):
+    with pytest.raises(ValueError):
+        parse_ndjson_line(line)
+
+
+def test_parse_product_names():
+    assert parse_product_names(["a", "b"]) == ["a", "b"]
+    assert parse_product_names({"product_names": ["c"]}) == ["c"]
+    with pytest.raises(ValueError):
+        parse_product_names({"names": ["c"]})
+    with pytest.raises(ValueError):
+        parse_product_names(["a", None])
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float16])
+def test_to_base64_round_trip(dtype):
+    embeddings = np.random.rand(3, 4).astype(dtype)
+    decoded = np.frombuffer(
+        base64.b64decode(to_base64(embeddings)), dtype=np.dtype(dtype).newbyteorder("<")
+    ).reshape(embeddings.shape)
+    np.testing.assert_array_equal(decoded, embeddings)
+
+
+def test_to_base64_big_endian_input():
+    embeddings = np.arange(4, dtype=">f4").reshape(2, 2)
+    decoded = np.frombuffer(base64.b64decode(to_base64(embeddings)), dtype="<f4")
+    np.testing.assert_array_equal(decoded.reshape(2, 2), embeddings)
+
+
+def test_to_npy_bytes_round_trip():
+    embeddings = np.random.rand(2, 5).astype(np.float16)
+    loaded = np.load(io.BytesIO(to_npy_bytes(embeddings)), allow_pickle=False)
+    assert loaded.dtype == np.float16
+    np.testing.assert_array_equal(loaded, embeddings)
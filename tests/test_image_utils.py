@@ -0,0 +1,65 @@
+import io
+import zipfile
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("PIL")
+
+from app.utils.image_utils import extract_images_from_zip
+
+
+def make_zip(entries, compression=zipfile.ZIP_DEFLATED) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression) as archive:
+        for name, data in entries.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def test_extracts_only_images_in_archive_order():
+    contents = make_zip(
+        {
+            "a.png": b"a",
+            "notes.txt": b"n",
+            "dir/B.JPG": b"b",
+            "__MACOSX/._a.png": b"x",
+            ".hidden.png": b"h",
+        }
+    )
+    images = extract_images_from_zip(contents, 10, 100, 1000)
+    assert images == [("a.png", b"a"), ("dir/B.JPG", b"b")]
+
+
+def test_rejects_too_many_images():
+    contents = make_zip({"a.png": b"a", "b.png": b"b"})
+    with pytest.raises(ValueError, match="more than 1 images"):
+        extract_images_from_zip(contents, 1, 100, 1000)
+
+
+def test_rejects_oversized_entry_before_reading():
+    contents = make_zip({"bomb.png": b"\0" * 1_000_000})
+    assert len(contents) < 10_000
+    with pytest.raises(ValueError, match="bomb.png exceeds"):
+        extract_images_from_zip(contents, 10, 1000, 10**9)
+
+
+def test_rejects_oversized_archive():
+    contents = make_zip({"a.png": b"\0" * 600, "b.png": b"\0" * 600})
+    with pytest.raises(ValueError, match="maximum uncompressed size"):
+        extract_images_from_zip(contents, 10, 1000, 1000)
+
+
+def test_corrupt_entry_raises_value_error():
+    data = b"receipt" * 1000
+    contents = bytearray(make_zip({"a.png": data}))
+    # Corrupt the middle of the compressed stream, after the local header
+    start = contents.index(b"a.png") + len("a.png")
+    for offset in range(start + 5, start + 25):
+        contents[offset] ^= 0xFF
+    with pytest.raises(ValueError, match="Corrupt entry a.png"):
+        extract_images_from_zip(bytes(contents), 10, 10**6, 10**6)
+
+
+def test_invalid_archive():
+    with pytest.raises(zipfile.BadZipFile):
+        extract_images_from_zip(b"not a zip", 10, 100, 1000)
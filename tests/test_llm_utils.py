@@ -0,0 +1,100 @@
+import pytest
+
+pytest.importorskip("vertexai")
+
+from app.utils import llm_utils
+from app.utils.llm_utils import (
+    LLMResponseError,
+    extract_json,
+    fix_typos_and_parse_batch,
+    parse_receipt_texts,
+)
+
+
+def test_extract_json_raises_response_error():
+    assert extract_json('text {"a": 1} text', "{", "}") == {"a": 1}
+    with pytest.raises(LLMResponseError):
+        extract_json("no json here", "[", "]")
+    with pytest.raises(LLMResponseError):
+        extract_json('[{"a": 1}', "[", "]")
+
+
+def test_batch_maps_results_by_receipt_index(monkeypatch):
+    response = """```json
+    [
+        {"receipt_index": 2, "items": [{"product_name": "C", "quantity": 1}]},
+        {"receipt_index": 0, "items": [{"product_name": "A", "quantity": 2}]},
+        {"receipt_index": 0, "items": []},
+        {"receipt_index": 7, "items": []},
+        "junk"
+    ]
+    ```"""
+    monkeypatch.setattr(llm_utils.gemini_llm, "generate", lambda prompt: response)
+
+    results = fix_typos_and_parse_batch([["a"], ["b"], ["c"]], ["A", "B", "C"])
+
+    assert results[0] == {"items": [{"product_name": "A", "quantity": 2}]}
+    assert results[1] is None
+    assert results[2] == {"items": [{"product_name": "C", "quantity": 1}]}
+
+
+def test_batch_ignores_non_object_entries(monkeypatch):
+    monkeypatch.setattr(llm_utils.gemini_llm, "generate", lambda prompt: "[1, null]")
+    assert fix_typos_and_parse_batch([["a"], ["b"]], []) == [None, None]
+
+
+def test_batch_without_json_raises_response_error(monkeypatch):
+    monkeypatch.setattr(llm_utils.gemini_llm, "generate", lambda prompt: "Sorry.")
+    with pytest.raises(LLMResponseError):
+        fix_typos_and_parse_batch([["a"]], [])
+
+
+class FakeParsers:
+    """Stand-ins for the Gemini parsing calls used by parse_receipt_texts."""
+
+    def __init__(self, batch_error=None):
+        self.calls = []
+        self.batch_error = batch_error
+
+    def batch(self, texts, products):
+        self.calls.append(("batch", len(texts)))
+        if self.batch_error:
+            raise self.batch_error
+        if "bad" in texts:
+            raise LLMResponseError("truncated JSON")
+        return [None if text == "missing" else {"text": text} for text in texts]
+
+    def single(self, text, products):
+        self.calls.append(("single", text))
+        if text == "bad":
+            raise LLMResponseError("still truncated")
+        return {"text": text}
+
+
+def install(monkeypatch, parsers):
+    monkeypatch.setattr(llm_utils, "fix_typos_and_parse_batch", parsers.batch)
+    monkeypatch.setattr(llm_utils, "fix_typos_and_parse", parsers.single)
+
+
+def test_parse_receipt_texts_splits_on_response_errors(monkeypatch):
+    parsers = FakeParsers()
+    install(monkeypatch, parsers)
+
+    results = parse_receipt_texts(["a", "b", "bad", "missing", "c"], [])
+
+    assert results[:2] == [{"text": "a"}, {"text": "b"}]
+    assert isinstance(results[2], LLMResponseError)
+    assert results[3:] == [{"text": "missing"}, {"text": "c"}]
+    assert ("single", "bad") in parsers.calls
+    assert ("single", "missing") in parsers.calls
+
+
+def test_parse_receipt_texts_fails_chunk_on_transport_errors(monkeypatch):
+    outage = ValueError("Error during Vertex AI Gemini processing: 503")
+    parsers = FakeParsers(batch_error=outage)
+    install(monkeypatch, parsers)
+
+    results = parse_receipt_texts(["a", "b", "c", "d"], [])
+
+    assert results == [outage] * 4
+    assert parsers.calls == [("batch", 4)]
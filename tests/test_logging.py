@@ -0,0 +1,70 @@
+import json
+import queue
+import logging
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.common.logging import JsonFormatter, NonBlockingQueueHandler
+
+
+def make_record(msg, args=(), level=logging.INFO, **extra):
+    record = logging.LogRecord("test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_prepare_snapshots_mutable_args():
+    handler = NonBlockingQueueHandler(queue.Queue())
+    items = ["a"]
+    prepared = handler.prepare(make_record("items %s", (items,)))
+    items.append("MUTATED")
+
+    assert prepared.getMessage() == "items ['a']"
+    assert prepared.args is None
+
+
+def test_prepare_renders_mutable_extras_and_keeps_scalars():
+    handler = NonBlockingQueueHandler(queue.Queue())
+    payload = [1, 2]
+    prepared = handler.prepare(make_record("x", payload=payload, count=3, ok=True))
+    payload.append(3)
+
+    assert prepared.payload == "[1, 2]"
+    assert prepared.count == 3
+    assert prepared.ok is True
+
+
+def test_json_formatter_keeps_json_scalars():
+    record = make_record(
+        "done", count=3, ok=False, ratio=0.5, missing=None, request_id="abc"
+    )
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["message"] == "done"
+    assert entry["request_id"] == "abc"
+    assert entry["count"] == 3
+    assert entry["ok"] is False
+    assert entry["ratio"] == 0.5
+    assert entry["missing"] is None
+
+
+def test_enqueue_counts_and_reports_dropped_records():
+    log_queue = queue.Queue(maxsize=1)
+    handler = NonBlockingQueueHandler(log_queue)
+
+    handler.enqueue(make_record("first"))
+    handler.enqueue(make_record("lost info"))
+    handler.enqueue(make_record("lost error", level=logging.ERROR))
+    assert (handler.dropped, handler.dropped_warnings) == (2, 1)
+
+    log_queue.get_nowait()
+    log_queue.maxsize = 2
+    handler.enqueue(make_record("after"))
+
+    report = log_queue.get_nowait()
+    assert report.levelno == logging.WARNING
+    assert report.dropped == 2
+    assert "1 at WARNING or above" in report.getMessage()
+    assert log_queue.get_nowait().getMessage() == "after"
+    assert handler.dropped == 0